@@ -1,10 +1,20 @@
 import sys
 import os
+import re
+import signal
+import socket
 import subprocess
 import time
 import tempfile
+import sysconfig
+import importlib.util
+import struct
+import shlex
+import queue
+import threading
 from pathlib import Path
 from functools import partial
+from collections import OrderedDict
 
 from PyQt5.QtCore import (
     Qt,
@@ -16,7 +26,8 @@ from PyQt5.QtCore import (
     pyqtSignal,
     QObject,
     QPropertyAnimation,
-    QEasingCurve,
+    QSequentialAnimationGroup,
+    QPauseAnimation,
 )
 from PyQt5.QtGui import QIcon, QFont, QDragEnterEvent, QDropEvent, QPalette, QColor
 from PyQt5.QtWidgets import (
@@ -28,11 +39,13 @@ from PyQt5.QtWidgets import (
     QPushButton,
     QLabel,
     QLineEdit,
+    QCheckBox,
     QTextEdit,
     QTableWidget,
     QTableWidgetItem,
     QFileDialog,
     QMessageBox,
+    QInputDialog,
     QHeaderView,
     QProgressBar,
     QToolBar,
@@ -42,87 +55,529 @@ from PyQt5.QtWidgets import (
     QListWidget,
     QListWidgetItem,
     QSizePolicy,
+    QGraphicsOpacityEffect,
 )
 
 import warnings
 
+try:
+    from cydifflib import SequenceMatcher
+except ImportError:
+    from difflib import SequenceMatcher
+
 warnings.filterwarnings("ignore", category=DeprecationWarning)
 
 
+_TRAILING_WS = re.compile(rb"[ \t\r]+(?=\n|\Z)")
+
+
+def _decode(data):
+    return data.decode("utf-8", errors="replace")
+
+
+def normalize_output(data):
+    return _TRAILING_WS.sub(b"", data).strip()
+
+
+class AnswerCache:
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, path):
+        st = os.stat(path)
+        key = (path, st.st_mtime_ns, st.st_size)
+        with self._lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+                return data
+        with open(path, "rb", buffering=1 << 16) as f:
+            data = normalize_output(f.read())
+        if len(data) > self.max_bytes:
+            return data
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = data
+                self._size += len(data)
+                while self._size > self.max_bytes:
+                    _, old = self._entries.popitem(last=False)
+                    self._size -= len(old)
+        return data
+
+
+ANSWER_CACHE_BYTES = 64 << 20
+
+_answers = AnswerCache(ANSWER_CACHE_BYTES)
+
+
+def read_answer(path):
+    return _answers.get(path)
+
+
+def _parse_cpu_list(text):
+    cpus = set()
+    for part in text.strip().split(","):
+        lo, _, hi = part.partition("-")
+        cpus.update(range(int(lo), int(hi or lo) + 1))
+    return cpus
+
+
+def physical_cores():
+    if not hasattr(os, "sched_getaffinity"):
+        return list(range(max(1, (os.cpu_count() or 2) // 2)))
+    cores, seen = [], set()
+    for cpu in sorted(os.sched_getaffinity(0)):
+        if cpu in seen:
+            continue
+        topology = Path(f"/sys/devices/system/cpu/cpu{cpu}/topology")
+        try:
+            siblings = (topology / "thread_siblings_list").read_text()
+            seen.update(_parse_cpu_list(siblings))
+        except (OSError, ValueError):
+            seen.add(cpu)
+        cores.append(cpu)
+    return cores
+
+
+def pin_to_core(pid, core):
+    if core is None or not hasattr(os, "sched_setaffinity"):
+        return
+    try:
+        os.sched_setaffinity(pid, {core})
+    except OSError:
+        pass
+
+
+def kill_process_group(proc):
+    if proc.poll() is not None:
+        return
+    if hasattr(os, "killpg"):
+        try:
+            os.killpg(proc.pid, signal.SIGKILL)
+            return
+        except OSError:
+            pass
+    proc.kill()
+
+
+def _drain(stream, out):
+    buf = bytearray(128 * 1024)
+    view = memoryview(buf)
+    while True:
+        n = stream.readinto(buf)
+        if not n:
+            break
+        out += view[:n]
+
+
+_PY_HARNESS = r"""
+import atexit, os, runpy, socket, struct, sys, time
+
+solution, ctl = sys.argv[1], socket.socket(fileno=int(sys.argv[2]))
+sys.argv = [solution]
+sys.path[0] = os.path.dirname(os.path.abspath(solution))
+runpy.run_path(os.devnull)
+
+forked = False
+while not forked:
+    try:
+        msg, fds, _, _ = socket.recv_fds(ctl, 1, 3)
+    except OSError:
+        break
+    if not msg or len(fds) != 3:
+        break
+    start = time.perf_counter()
+    pid = os.fork()
+    if pid == 0:
+        forked = True
+        ctl.close()
+        os.setsid()
+        for target, fd in enumerate(fds):
+            os.dup2(fd, target)
+            os.close(fd)
+        continue
+    for fd in fds:
+        os.close(fd)
+    ctl.sendall(struct.pack("<i", pid))
+    status = os.waitpid(pid, 0)[1]
+    elapsed = time.perf_counter() - start
+    ctl.sendall(struct.pack("<id", os.waitstatus_to_exitcode(status), elapsed))
+
+if not forked:
+    sys.exit(0)
+code = 0
+try:
+    runpy.run_path(solution, run_name="__main__")
+except SystemExit as e:
+    if isinstance(e.code, int):
+        code = e.code
+    elif e.code is not None:
+        print(e.code, file=sys.stderr)
+        code = 1
+except BaseException:
+    sys.excepthook(*sys.exc_info())
+    code = 1
+atexit._run_exitfuncs()
+for stream in (sys.stdout, sys.stderr):
+    try:
+        stream.flush()
+    except Exception:
+        code = code or 120
+os._exit(code & 0xFF)
+"""
+
+PERSISTENT_RUNNERS = hasattr(os, "fork") and hasattr(socket, "send_fds")
+
+_PID = struct.Struct("<i")
+_EXIT = struct.Struct("<id")
+
+AC_STDOUT_KEEP = 4096
+DIFF_ALIGN_LINES = 2000
+DIFF_MAX_LINES = 200
+
+DEFAULT_C_FLAGS = "-O3 -march=native -mtune=native -flto -pipe -std=c11"
+DEFAULT_CPP_FLAGS = "-O3 -march=native -mtune=native -flto -pipe -std=c++17"
+
+
+class PersistentRunner:
+    def __init__(self, solution):
+        self.solution = solution
+        self.proc = None
+        self.sock = None
+        self.pid = None
+
+    def _start(self):
+        ours, theirs = socket.socketpair()
+        with theirs:
+            fd = theirs.fileno()
+            self.proc = subprocess.Popen(
+                [sys.executable, "-c", _PY_HARNESS, self.solution, str(fd)],
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                pass_fds=(fd,),
+                start_new_session=True,
+            )
+        self.sock = ours
+
+    def run(self, inp_fd, timeout, core=None):
+        if self.proc is None or self.proc.poll() is not None:
+            self.close()
+            self._start()
+        out_r, out_w = os.pipe()
+        err_r, err_w = os.pipe()
+        stdout, stderr = bytearray(), bytearray()
+        with open(out_r, "rb") as out, open(err_r, "rb") as err:
+            readers = [
+                threading.Thread(target=_drain, args=(out, stdout), daemon=True),
+                threading.Thread(target=_drain, args=(err, stderr), daemon=True),
+            ]
+            for r in readers:
+                r.start()
+            try:
+                reply, timed_out = self._exchange(inp_fd, out_w, err_w, timeout, core)
+            finally:
+                for r in readers:
+                    r.join()
+        if reply is None:
+            self.close()
+        if timed_out:
+            raise subprocess.TimeoutExpired(self.solution, timeout)
+        if reply is None:
+            return 1, bytes(stdout), b"Solution process exited unexpectedly", 0.0
+        code, elapsed = _EXIT.unpack(reply)
+        return code, bytes(stdout), bytes(stderr), elapsed
+
+    def _exchange(self, inp_fd, out_w, err_w, timeout, core):
+        try:
+            socket.send_fds(self.sock, [b"R"], [inp_fd, out_w, err_w])
+        except OSError:
+            return None, False
+        finally:
+            os.close(out_w)
+            os.close(err_w)
+        self.sock.settimeout(timeout)
+        try:
+            head = self._recv(_PID.size)
+            if head is None:
+                return None, False
+            self.pid = _PID.unpack(head)[0]
+            pin_to_core(self.pid, core)
+            return self._recv(_EXIT.size), False
+        except socket.timeout:
+            if self.pid is None:
+                self.close()
+                return None, True
+            self.kill()
+            self.sock.settimeout(None)
+            return self._recv(_EXIT.size), True
+        finally:
+            self.pid = None
+
+    def _recv(self, n):
+        buf = bytearray(n)
+        view = memoryview(buf)
+        got = 0
+        while got < n:
+            k = self.sock.recv_into(view[got:])
+            if not k:
+                return None
+            got += k
+        return bytes(buf)
+
+    def kill(self):
+        pid = self.pid
+        if pid is not None:
+            try:
+                os.killpg(pid, signal.SIGKILL)
+            except OSError:
+                pass
+
+    def close(self):
+        self.kill()
+        if self.sock is not None:
+            self.sock.close()
+            self.sock = None
+        proc, self.proc = self.proc, None
+        if proc is not None:
+            kill_process_group(proc)
+            proc.wait()
+
+
+class RunnerPool:
+    def __init__(self, solution, size):
+        self.solution = solution
+        self._idle = queue.LifoQueue()
+        for _ in range(size):
+            self._idle.put(PersistentRunner(solution))
+
+    def acquire(self):
+        return self._idle.get()
+
+    def release(self, runner):
+        self._idle.put(runner)
+
+    def close(self):
+        while not self._idle.empty():
+            self._idle.get_nowait().close()
+
+
+class TestResult:
+    __slots__ = (
+        "status",
+        "stdout",
+        "stderr",
+        "time",
+        "diff",
+        "expected",
+        "got",
+        "truncated",
+    )
+
+    def __init__(
+        self, status, stdout, stderr, time, diff=None, expected=None, got=None
+    ):
+        self.status = status
+        self.stdout = stdout
+        self.stderr = stderr
+        self.time = time
+        self.diff = diff
+        self.expected = expected
+        self.got = got
+        self.truncated = False
+
+
 class Signals(QObject):
-    finished = pyqtSignal(int, dict)
+    finished = pyqtSignal(int, object)
     log = pyqtSignal(str)
     progress = pyqtSignal(int)
 
 
 class RunTask(QRunnable):
-    def __init__(self, idx, cmd, inp_path, ans_path, timeout=2):
+    def __init__(
+        self,
+        idx,
+        cmd,
+        inp_path,
+        ans_path,
+        timeout=2,
+        runners=None,
+        cores=None,
+        full_capture=False,
+    ):
         super().__init__()
         self.idx = idx
         self.cmd = cmd
+        self.runners = runners
+        self.cores = cores
+        self._cancelled = False
+        self._proc = None
+        self._runner = None
         self.inp_path = inp_path
         self.ans_path = ans_path
         self.timeout = timeout
+        self.full_capture = full_capture
         self.signals = Signals()
 
     def run(self):
         try:
-            with open(self.inp_path, "r") as f:
-                start = time.perf_counter()
-                proc = subprocess.run(
-                    self.cmd,
-                    stdin=f,
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.PIPE,
-                    text=True,
-                    timeout=self.timeout,
-                )
-                end = time.perf_counter()
-            elapsed = end - start
+            returncode, stdout, stderr, elapsed = self._execute()
+        except OSError as e:
+            res = TestResult("RE", b"", str(e).encode(), 0.0)
+            self.signals.log.emit(f"Test {self.idx + 1}: Runtime Error")
+            self.signals.finished.emit(self.idx, res)
+            return
         except subprocess.TimeoutExpired:
-            res = {
-                "status": "TLE",
-                "stdout": "",
-                "stderr": "Time Limit Exceeded",
-                "time": self.timeout,
-            }
+            res = TestResult("TLE", b"", b"Time Limit Exceeded", self.timeout)
             self.signals.log.emit(f"Test {self.idx + 1}: TLE")
             self.signals.finished.emit(self.idx, res)
             return
 
-        if proc.returncode != 0:
-            res = {
-                "status": "RE",
-                "stdout": proc.stdout,
-                "stderr": proc.stderr,
-                "time": elapsed,
-            }
+        if self._cancelled:
+            res = TestResult("Cancelled", stdout, stderr, elapsed)
+            self.signals.log.emit(f"Test {self.idx + 1}: Cancelled")
+            self.signals.finished.emit(self.idx, res)
+            return
+
+        if returncode != 0:
+            res = TestResult("RE", stdout, stderr, elapsed)
             self.signals.log.emit(f"Test {self.idx + 1}: Runtime Error")
             self.signals.finished.emit(self.idx, res)
             return
 
-        expected = Path(self.ans_path).read_text().strip()
-        got = proc.stdout.strip()
+        expected = read_answer(self.ans_path)
+        got = normalize_output(stdout)
         status = "Accepted" if got == expected else "Wrong Answer"
-        diff = self._make_diff(expected, got)
-        res = {
-            "status": status,
-            "stdout": proc.stdout,
-            "stderr": proc.stderr,
-            "diff": diff,
-            "time": elapsed,
-        }
+        if status == "Accepted" and not self.full_capture:
+            res = TestResult(
+                status,
+                stdout[:AC_STDOUT_KEEP],
+                stderr,
+                elapsed,
+                diff="Outputs match exactly.",
+            )
+            res.truncated = len(stdout) > AC_STDOUT_KEEP
+        else:
+            res = TestResult(
+                status, stdout, stderr, elapsed, expected=expected, got=got
+            )
         self.signals.log.emit(f"Test {self.idx + 1}: {status} ({elapsed:.3f}s)")
         self.signals.finished.emit(self.idx, res)
 
-    def _make_diff(self, exp, got):
+    def cancel(self):
+        self._cancelled = True
+        proc, runner = self._proc, self._runner
+        if proc is not None:
+            kill_process_group(proc)
+        if runner is not None:
+            runner.kill()
+
+    def _execute(self):
+        core = self.cores.get() if self.cores is not None else None
+        try:
+            if self._cancelled:
+                return -1, b"", b"", 0.0
+            inp_fd = os.open(self.inp_path, os.O_RDONLY)
+            try:
+                if self.runners is not None:
+                    return self._execute_persistent(inp_fd, core)
+                return self._execute_process(inp_fd, core)
+            finally:
+                os.close(inp_fd)
+        finally:
+            if core is not None:
+                self.cores.put(core)
+
+    def _execute_persistent(self, inp_fd, core):
+        self._runner = self.runners.acquire()
+        try:
+            return self._runner.run(inp_fd, self.timeout, core)
+        finally:
+            self.runners.release(self._runner)
+            self._runner = None
+
+    def _execute_process(self, inp_fd, core):
+        start = time.perf_counter()
+        proc = subprocess.Popen(
+            self.cmd,
+            stdin=inp_fd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            close_fds=False,
+            start_new_session=True,
+        )
+        self._proc = proc
+        pin_to_core(proc.pid, core)
+        stdout, stderr = bytearray(), bytearray()
+        readers = [
+            threading.Thread(target=_drain, args=(proc.stdout, stdout), daemon=True),
+            threading.Thread(target=_drain, args=(proc.stderr, stderr), daemon=True),
+        ]
+        for r in readers:
+            r.start()
+        timed_out = False
+        delay = 0.001
+        while proc.poll() is None:
+            if self._cancelled:
+                kill_process_group(proc)
+                break
+            if time.perf_counter() - start > self.timeout:
+                timed_out = True
+                kill_process_group(proc)
+                break
+            time.sleep(delay)
+            delay = min(delay * 1.5, 0.020)
+        end = time.perf_counter()
+        proc.wait()
+        for r in readers:
+            r.join()
+        proc.stdout.close()
+        proc.stderr.close()
+        self._proc = None
+        if timed_out:
+            raise subprocess.TimeoutExpired(self.cmd, self.timeout)
+        return proc.returncode, bytes(stdout), bytes(stderr), end - start
+
+    @staticmethod
+    def _make_diff(exp, got):
+        if exp == got:
+            return "Outputs match exactly."
         e_lines, g_lines = exp.splitlines(), got.splitlines()
         out = []
-        for i in range(max(len(e_lines), len(g_lines))):
-            e = e_lines[i] if i < len(e_lines) else "<none>"
-            g = g_lines[i] if i < len(g_lines) else "<none>"
-            if e != g:
-                out.append(f"Line {i + 1}: Expected [{e}] Got [{g}]")
+        n = min(len(e_lines), len(g_lines))
+        lo = 0
+        while lo < n and e_lines[lo] == g_lines[lo]:
+            lo += 1
+        hi = 0
+        while hi < n - lo and e_lines[-1 - hi] == g_lines[-1 - hi]:
+            hi += 1
+        e_mid = e_lines[lo : len(e_lines) - hi]
+        g_mid = g_lines[lo : len(g_lines) - hi]
+        if max(len(e_mid), len(g_mid)) > DIFF_ALIGN_LINES:
+            for i in range(lo, max(len(e_lines), len(g_lines))):
+                e = e_lines[i] if i < len(e_lines) else "<none>"
+                g = g_lines[i] if i < len(g_lines) else "<none>"
+                if e != g:
+                    out.append(f"Line {i + 1}: Expected [{e}] Got [{g}]")
+                    if len(out) == DIFF_MAX_LINES:
+                        break
+        else:
+            matcher = SequenceMatcher(None, e_mid, g_mid)
+            for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+                if tag == "equal":
+                    continue
+                for k in range(max(i2 - i1, j2 - j1)):
+                    if len(out) == DIFF_MAX_LINES:
+                        break
+                    e = e_mid[i1 + k] if i1 + k < i2 else "<none>"
+                    g = g_mid[j1 + k] if j1 + k < j2 else "<none>"
+                    line = lo + min(i1 + k, i2) + 1
+                    out.append(f"Line {line}: Expected [{e}] Got [{g}]")
+        if len(out) == DIFF_MAX_LINES:
+            out.append(f"... showing the first {DIFF_MAX_LINES} differing lines")
         return "\n".join(out) or "Outputs match exactly."
 
 
@@ -134,9 +589,22 @@ class App(QMainWindow):
         self._setup_palette()
         self.solution = None
         self.exec_path = None
+        self._compiled = None
+        self.c_flags = DEFAULT_C_FLAGS
+        self.cpp_flags = DEFAULT_CPP_FLAGS
         self.testcases = []
+        self._row_items = []
         self.results = []
-        self.threadpool = QThreadPool.globalInstance()
+        self.runners = None
+        self._detail_row = -1
+        cores = physical_cores()
+        self.cores = None
+        if hasattr(os, "sched_setaffinity"):
+            self.cores = queue.Queue()
+            for core in cores:
+                self.cores.put(core)
+        self.threadpool = QThreadPool()
+        self.threadpool.setMaxThreadCount(len(cores))
         self._init_ui()
 
     def _setup_palette(self):
@@ -172,6 +640,12 @@ class App(QMainWindow):
         act_add_folder.triggered.connect(self.add_folder)
         toolbar.addAction(act_add_folder)
 
+        act_flags = QAction(
+            QIcon.fromTheme("preferences-system"), "Compiler Flags", self
+        )
+        act_flags.triggered.connect(self.edit_compiler_flags)
+        toolbar.addAction(act_flags)
+
         act_save = QAction(QIcon.fromTheme("document-save"), "Save Report", self)
         act_save.triggered.connect(self.save_report)
         toolbar.addAction(act_save)
@@ -214,6 +688,10 @@ class App(QMainWindow):
         btn_row.addWidget(self.run_all_btn)
         left_layout.addLayout(btn_row)
 
+        self.cython_check = QCheckBox("Compile Python (Cython)")
+        self.cython_check.toggled.connect(self._on_cython_toggled)
+        left_layout.addWidget(self.cython_check)
+
         self.table = QTableWidget(0, 4)
         self.table.setHorizontalHeaderLabels(["#", "Input", "Status", "Time (s)"])
         self.table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
@@ -235,6 +713,12 @@ class App(QMainWindow):
         self.log_area = QTextEdit()
         self.log_area.setReadOnly(True)
         self.log_area.setMinimumWidth(420)
+        self.log_area.document().setMaximumBlockCount(2000)
+        self._log_pending = []
+        self._log_timer = QTimer(self)
+        self._log_timer.setSingleShot(True)
+        self._log_timer.setInterval(100)
+        self._log_timer.timeout.connect(self._flush_log)
         log_layout.addWidget(self.log_area)
         self.progress = QProgressBar()
         self.progress.setMinimum(0)
@@ -253,6 +737,10 @@ class App(QMainWindow):
         self.details = QTextEdit()
         self.details.setReadOnly(True)
         detail_layout.addWidget(self.details)
+        self.full_capture_btn = QPushButton("Re-run with Full Capture")
+        self.full_capture_btn.setEnabled(False)
+        self.full_capture_btn.clicked.connect(self.rerun_full_capture)
+        detail_layout.addWidget(self.full_capture_btn)
         detail_panel.setLayout(detail_layout)
         right_splitter.addWidget(detail_panel)
 
@@ -286,19 +774,29 @@ class App(QMainWindow):
         pass
 
     def _setup_animation_loop(self):
-        self._pulse_timer = QTimer()
-        self._pulse_timer.timeout.connect(self._animate_compile_button)
-        self._pulse_timer.start(2000)
+        effect = QGraphicsOpacityEffect(self.compile_btn)
+        effect.setOpacity(1.0)
+        self.compile_btn.setGraphicsEffect(effect)
+        pulse = QPropertyAnimation(effect, b"opacity")
+        pulse.setDuration(600)
+        pulse.setKeyValueAt(0.0, 1.0)
+        pulse.setKeyValueAt(0.5, 0.6)
+        pulse.setKeyValueAt(1.0, 1.0)
+        self._pulse_anim = QSequentialAnimationGroup(self)
+        self._pulse_anim.addAnimation(pulse)
+        self._pulse_anim.addAnimation(QPauseAnimation(1400))
+        self._pulse_anim.setLoopCount(-1)
 
     def _animate_compile_button(self):
-        anim = QPropertyAnimation(self.compile_btn, b"geometry")
-        rect = self.compile_btn.geometry()
-        anim.setDuration(600)
-        anim.setStartValue(rect)
-        anim.setEndValue(rect.adjusted(-4, -2, 4, 2))
-        anim.setEasingCurve(QEasingCurve.InOutQuad)
-        anim.setLoopCount(1)
-        anim.start()
+        self._pulse_anim.start()
+
+    def showEvent(self, e):
+        super().showEvent(e)
+        self._animate_compile_button()
+
+    def hideEvent(self, e):
+        self._pulse_anim.stop()
+        super().hideEvent(e)
 
     def dragEnterEvent(self, e: QDragEnterEvent):
         if e.mimeData().hasUrls():
@@ -310,12 +808,11 @@ class App(QMainWindow):
             return
         path = urls[0].toLocalFile()
         if Path(path).suffix in (".py", ".c", ".cpp"):
-            self.solution = path
-            self.solution_path.setText(path)
-            self.exec_path = None
+            self._set_solution(path)
 
     def _update_table(self):
         self.table.setRowCount(len(self.testcases))
+        self._row_items = []
         for i, (inp, ans) in enumerate(self.testcases):
             idx = QTableWidgetItem(str(i + 1))
             name = QTableWidgetItem(Path(inp).name)
@@ -327,6 +824,9 @@ class App(QMainWindow):
             self.table.setItem(i, 1, name)
             self.table.setItem(i, 2, status_item)
             self.table.setItem(i, 3, time_item)
+            self._row_items.append((status_item, time_item))
+            if i < len(self.results) and self.results[i]:
+                self._update_result_row(i, self.results[i])
 
     def select_solution(self):
         path, _ = QFileDialog.getOpenFileName(
@@ -334,9 +834,15 @@ class App(QMainWindow):
         )
         if not path:
             return
+        self._set_solution(path)
+
+    def _set_solution(self, path):
         self.solution = path
         self.solution_path.setText(path)
         self.exec_path = None
+        if self.runners is not None:
+            self.runners.close()
+            self.runners = None
 
     def add_pair(self):
         inp, _ = QFileDialog.getOpenFileName(
@@ -373,52 +879,135 @@ class App(QMainWindow):
             QMessageBox.warning(self, "No solution", "Select a solution first")
             return
         ext = Path(self.solution).suffix
-        if ext == ".py":
+        if ext == ".py" and not self.cython_check.isChecked():
             self.exec_path = None
             QMessageBox.information(
                 self, "Python", "Python script selected — no compilation required"
             )
             return
+        if ext == ".py" and importlib.util.find_spec("Cython") is None:
+            self.exec_path = None
+            self.cython_check.setChecked(False)
+            QMessageBox.information(
+                self, "Python", "Cython is not installed — running with Python"
+            )
+            self._log("Cython not available, falling back to Python")
+            return
+        flags = {".c": self.c_flags, ".cpp": self.cpp_flags}.get(ext, "cython")
+        try:
+            st = os.stat(self.solution)
+            key = (self.solution, st.st_mtime_ns, st.st_size, flags)
+        except OSError:
+            key = None
+        if key and self._compiled and self._compiled[0] == key:
+            if Path(self._compiled[1]).exists():
+                self.exec_path = self._compiled[1]
+                self._log(f"Up to date: {self.exec_path}")
+                return
         exe = tempfile.NamedTemporaryFile(
             delete=False, prefix="judge_exec_", dir=os.getcwd()
         )
         exe.close()
         if ext == ".c":
-            cmd = ["gcc", self.solution, "-O2", "-std=c11", "-o", exe.name]
+            flags = shlex.split(self.c_flags)
+            cmds = [["gcc", self.solution, *flags, "-o", exe.name]]
+        elif ext == ".py":
+            cmds = self._cython_cmds(exe.name)
         else:
-            cmd = ["g++", self.solution, "-O2", "-std=c++17", "-o", exe.name]
+            flags = shlex.split(self.cpp_flags)
+            cmds = [["g++", self.solution, *flags, "-o", exe.name]]
         self._log("Compiling...")
-        proc = subprocess.run(
-            cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True
-        )
+        for cmd in cmds:
+            proc = subprocess.run(
+                cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True
+            )
+            if proc.returncode != 0:
+                break
+        if ext == ".py":
+            try:
+                os.remove(exe.name + ".c")
+            except OSError:
+                pass
         if proc.returncode != 0:
             QMessageBox.critical(self, "Compilation Error", proc.stderr)
             self._log("Compilation failed")
             return
         self.exec_path = exe.name
+        self._compiled = (key, exe.name)
         QMessageBox.information(self, "Compiled", f"Compiled → {exe.name}")
         self._log(f"Compiled binary at {exe.name}")
 
+    def edit_compiler_flags(self):
+        c_flags, ok = QInputDialog.getText(
+            self, "Compiler Flags", "C flags (gcc):", text=self.c_flags
+        )
+        if not ok:
+            return
+        cpp_flags, ok = QInputDialog.getText(
+            self, "Compiler Flags", "C++ flags (g++):", text=self.cpp_flags
+        )
+        if not ok:
+            return
+        for flags in (c_flags, cpp_flags):
+            try:
+                shlex.split(flags)
+            except ValueError as e:
+                QMessageBox.warning(self, "Compiler Flags", f"Invalid flags: {e}")
+                return
+        self.c_flags = c_flags.strip() or DEFAULT_C_FLAGS
+        self.cpp_flags = cpp_flags.strip() or DEFAULT_CPP_FLAGS
+        if self.solution and Path(self.solution).suffix in (".c", ".cpp"):
+            self.exec_path = None
+        self._log(f"Compiler flags: gcc {self.c_flags} | g++ {self.cpp_flags}")
+
+    def _cython_cmds(self, exe):
+        c_file = exe + ".c"
+        cfg = sysconfig.get_config_var
+        libdir = cfg("LIBDIR") or ""
+        link = [f"-L{libdir}", f"-L{cfg('LIBPL') or libdir}", f"-Wl,-rpath,{libdir}"]
+        link.append(f"-lpython{cfg('LDVERSION')}")
+        link += (cfg("LIBS") or "").split() + (cfg("SYSLIBS") or "").split()
+        cython = [sys.executable, "-m", "cython", "--embed", "-3", self.solution]
+        include = sysconfig.get_paths()["include"]
+        return [
+            cython + ["-o", c_file],
+            ["gcc", c_file, "-O2", f"-I{include}", "-o", exe] + link,
+        ]
+
+    def _on_cython_toggled(self, _checked):
+        if self.solution and Path(self.solution).suffix == ".py":
+            self.exec_path = None
+
     def prepare_cmd(self):
         if not self.solution:
             return None, "No solution selected"
         ext = Path(self.solution).suffix
         if ext == ".py":
+            if self.cython_check.isChecked():
+                self.exec_path = None
+                self.compile_solution()
+            if self.exec_path:
+                return [self.exec_path], None
             return [sys.executable, self.solution], None
         if ext in (".c", ".cpp"):
-            if not self.exec_path or not Path(self.exec_path).exists():
-                self.compile_solution()
+            self.exec_path = None
+            self.compile_solution()
             if not self.exec_path:
                 return None, "Compilation failed"
             return [self.exec_path], None
         return None, "Unsupported file type"
 
+    def _python_runners(self):
+        if self.runners is None:
+            self.runners = RunnerPool(self.solution, self.threadpool.maxThreadCount())
+        return self.runners
+
     def run_selected(self):
         row = self.table.currentRow()
         if row < 0:
             QMessageBox.warning(self, "Select", "Select a test row first")
             return
-        self.run_indices([row])
+        self.run_indices([row], clear=False)
 
     def run_all(self):
         if not self.testcases:
@@ -426,12 +1015,35 @@ class App(QMainWindow):
             return
         self.run_indices(list(range(len(self.testcases))))
 
-    def run_indices(self, indices):
+    def rerun_full_capture(self):
+        if 0 <= self._detail_row < len(self.testcases):
+            self.run_indices([self._detail_row], clear=False, full_capture=True)
+
+    def run_indices(self, indices, clear=True, full_capture=False):
         cmd, err = self.prepare_cmd()
         if err:
             QMessageBox.warning(self, "Error", err)
             return
-        self.results = [None] * len(self.testcases)
+        answer_bytes = 0
+        for i in indices:
+            inp, ans = self.testcases[i]
+            try:
+                os.stat(inp)
+                answer_bytes += os.stat(ans).st_size
+            except OSError as e:
+                QMessageBox.warning(self, "Error", str(e))
+                return
+        if answer_bytes <= ANSWER_CACHE_BYTES:
+            for i in indices:
+                read_answer(self.testcases[i][1])
+        have, need = len(self.results), len(self.testcases)
+        if have < need:
+            self.results.extend([None] * (need - have))
+        elif have > need:
+            del self.results[need:]
+        if clear:
+            for i in indices:
+                self.results[i] = None
         self.progress.setValue(0)
         total = len(indices)
         completed = 0
@@ -440,54 +1052,82 @@ class App(QMainWindow):
             nonlocal completed
             self.results[idx] = res
             self._update_result_row(idx, res)
+            if idx == self._detail_row:
+                self.show_details_from_table(idx, 0)
             completed += 1
             perc = int((completed / total) * 100)
             self.progress.setValue(perc)
             if completed == total:
                 self._log("All executions finished")
+                self._flush_log()
                 QMessageBox.information(self, "Done", "All testcases executed")
 
+        runners = None
+        if cmd[0] == sys.executable and PERSISTENT_RUNNERS:
+            runners = self._python_runners()
         for i in indices:
             inp, ans = self.testcases[i]
-            task = RunTask(i, cmd, inp, ans, timeout=2)
+            task = RunTask(
+                i,
+                cmd,
+                inp,
+                ans,
+                timeout=2,
+                runners=runners,
+                cores=self.cores,
+                full_capture=full_capture,
+            )
             task.signals.finished.connect(on_finished)
             task.signals.log.connect(self._log)
             self.threadpool.start(task)
 
     def _update_result_row(self, row, res):
-        status_item = QTableWidgetItem(res["status"])
-        status_item.setTextAlignment(Qt.AlignCenter)
-        if res["status"] == "Accepted":
+        status_item, time_item = self._row_items[row]
+        status_item.setText(res.status)
+        if res.status == "Accepted":
             status_item.setBackground(QColor("#0f5132"))
-        elif res["status"] in ("Wrong Answer",):
+        elif res.status in ("Wrong Answer",):
             status_item.setBackground(QColor("#4b0000"))
-        elif res["status"] in ("TLE",):
+        elif res.status in ("TLE",):
             status_item.setBackground(QColor("#4b2b00"))
-        elif res["status"] == "RE":
+        elif res.status == "RE":
             status_item.setBackground(QColor("#3a1b4b"))
         else:
             status_item.setBackground(QColor("#222222"))
-        time_item = QTableWidgetItem(f"{res.get('time', 0):.6f}")
-        time_item.setTextAlignment(Qt.AlignCenter)
-        self.table.setItem(row, 2, status_item)
-        self.table.setItem(row, 3, time_item)
+        time_item.setText(f"{res.time:.6f}")
 
     def show_details_from_table(self, row, _col):
         if row < 0 or row >= len(self.testcases):
             return
-        if not self.results or not self.results[row]:
+        if row >= len(self.results) or not self.results[row]:
             QMessageBox.information(self, "Info", "This test has not been run yet.")
             return
         res = self.results[row]
-        txt = f"Test #{row + 1}\nStatus: {res['status']}\nTime: {res.get('time', 0):.6f}s\n\n"
-        if res.get("stderr"):
-            txt += f"--- STDERR ---\n{res['stderr']}\n\n"
-        if res.get("stdout"):
-            txt += f"--- STDOUT ---\n{res['stdout']}\n\n"
-        if res.get("diff"):
-            txt += f"--- DIFF ---\n{res['diff']}\n"
+        self._detail_row = row
+        self.full_capture_btn.setEnabled(res.truncated)
+        self._materialize_diff(res)
+        txt = f"Test #{row + 1}\nStatus: {res.status}\nTime: {res.time:.6f}s\n\n"
+        if res.stderr:
+            txt += f"--- STDERR ---\n{_decode(res.stderr)}\n\n"
+        if res.truncated:
+            txt += f"--- STDOUT (first {AC_STDOUT_KEEP} bytes) ---\n"
+            txt += f"{_decode(res.stdout)}\n\n"
+        elif res.stdout:
+            txt += f"--- STDOUT ---\n{_decode(res.stdout)}\n\n"
+        if res.diff:
+            txt += f"--- DIFF ---\n{res.diff}\n"
         self.details.setPlainText(txt)
 
+    def _materialize_diff(self, res):
+        if res.expected is None:
+            return
+        exp, got = res.expected, res.got
+        res.expected = res.got = None
+        if exp == got:
+            res.diff = "Outputs match exactly."
+        else:
+            res.diff = RunTask._make_diff(_decode(exp), _decode(got))
+
     def save_report(self):
         if not self.results or all(r is None for r in self.results):
             QMessageBox.warning(self, "No results", "No results to save")
@@ -497,27 +1137,39 @@ class App(QMainWindow):
         )
         if not path:
             return
-        with open(path, "w") as f:
-            for i, r in enumerate(self.results):
-                if not r:
-                    f.write(f"Test #{i + 1}\nStatus: Not Run\n\n")
-                    continue
-                f.write(
-                    f"Test #{i + 1}\nStatus: {r['status']}\nTime: {r.get('time', 0):.6f}s\n"
-                )
-                if r.get("stderr"):
-                    f.write(f"--- STDERR ---\n{r['stderr']}\n")
-                if r.get("stdout"):
-                    f.write(f"--- STDOUT ---\n{r['stdout']}\n")
-                if r.get("diff"):
-                    f.write(f"--- DIFF ---\n{r['diff']}\n")
-                f.write("\n" + "-" * 40 + "\n")
+        parts = []
+        for i, r in enumerate(self.results):
+            if not r:
+                parts.append(f"Test #{i + 1}\nStatus: Not Run\n\n")
+                continue
+            self._materialize_diff(r)
+            parts.append(
+                f"Test #{i + 1}\nStatus: {r.status}\nTime: {r.time:.6f}s\n"
+            )
+            if r.stderr:
+                parts.append(f"--- STDERR ---\n{_decode(r.stderr)}\n")
+            if r.truncated:
+                parts.append(f"--- STDOUT (first {AC_STDOUT_KEEP} bytes) ---\n")
+                parts.append(f"{_decode(r.stdout)}\n")
+            elif r.stdout:
+                parts.append(f"--- STDOUT ---\n{_decode(r.stdout)}\n")
+            if r.diff:
+                parts.append(f"--- DIFF ---\n{r.diff}\n")
+            parts.append("\n" + "-" * 40 + "\n")
+        Path(path).write_text("".join(parts), encoding="utf-8")
         QMessageBox.information(self, "Saved", f"Report saved to {path}")
         self._log(f"Report saved → {path}")
 
     def _log(self, msg):
         ts = time.strftime("%H:%M:%S")
-        self.log_area.append(f"[{ts}] {msg}")
+        self._log_pending.append(f"[{ts}] {msg}")
+        if not self._log_timer.isActive():
+            self._log_timer.start()
+
+    def _flush_log(self):
+        if self._log_pending:
+            self.log_area.append("\n".join(self._log_pending))
+            self._log_pending = []
 
     def _neon_message(self, text):
         dlg = QMessageBox(self)